@@ -1,156 +1,159 @@
 """
-    ID: 13f9bf1b2f70f541722783cdf91a6b63d643983bbfde2ffa266286170048395a
+    ID: bd931a988227bf4142ca6b219e504fdbac8204c275c259887a7c8ded7cedafd3
 """
 
+import os
+import pickle
 import re
+from array import array
 
 from more_itertools import one
 
 from grammar import EOF, Terminal, Tokenizer
 from parsers.parser import ParseTree
 
-patterns: dict[str, re.Pattern] = {
-    "+": re.compile("\\+", re.DOTALL),
-    "*": re.compile("\\*", re.DOTALL),
-    "(": re.compile("\\(", re.DOTALL),
-    ")": re.compile("\\)", re.DOTALL),
-    "number": re.compile(
-        "((([0-9](?:_?[0-9])*\\.(?:[0-9](?:_?[0-9])*)?|\\.[0-9](?:_?[0-9])*)([eE][-+]?[0-9](?:_?[0-9])*)?|[0-9](?:_?[0-9])*[eE][-+]?[0-9](?:_?[0-9])*)|(0[xX](?:_?[0-9a-fA-F])+|0[bB](?:_?[01])+|0[oO](?:_?[0-7])+|(?:0(?:_?0)*|[1-9](?:_?[0-9])*)))",
-        re.DOTALL,
-    ),
-}  # type: ignore
+# the token patterns are compiled by the generator and pickled next to
+# this file; they are restored here in one load instead of being parsed
+# out of an embedded source literal
+with open(
+    os.path.join(os.path.dirname(__file__), "parser_patterns.pkl"), "rb"
+) as _patterns_file:
+    patterns: dict[str, re.Pattern] = pickle.load(_patterns_file)
 
 reserved: frozenset[str] = frozenset()  # type: ignore
 
 
 Shift = Goto = Accept = int
 Reduce = tuple[str, int]
-Action = int | Reduce
+Action = int
+
+# actions are packed as (payload << TAG_BITS) | tag; tag 0 is "no action",
+# so classifying an action is one mask and decoding it one shift
+TAG_BITS = 3
+TAG_MASK = 0b111
+SHIFT_TAG, GOTO_TAG, REDUCE_TAG, ACCEPT_TAG = 0b001, 0b010, 0b011, 0b100
 
 
 def is_accept(act: int) -> bool:
-    return act == -1
+    return act & TAG_MASK == ACCEPT_TAG
 
 
 def is_goto(act: int) -> bool:
-    return act & 0b1 == 0b0
+    return act & TAG_MASK == GOTO_TAG
 
 
 def is_shift(act: int) -> bool:
-    return act & 0b1 == 0b1
-
-
-parsing_table: dict[tuple[int, str], Action] = {
-    (1, "F"): 10,
-    (1, "T"): 6,
-    (1, "("): 15,
-    (1, "E"): 4,
-    (1, "number"): 31,
-    (2, "eof"): -1,
-    (3, "eof"): ("E0", 0),
-    (3, ")"): ("E0", 0),
-    (3, "+"): 19,
-    (3, "E0"): 8,
-    (4, "eof"): ("E", 2),
-    (4, ")"): ("E", 2),
-    (5, "eof"): ("T0", 0),
-    (5, "T0"): 12,
-    (5, "*"): 25,
-    (5, ")"): ("T0", 0),
-    (5, "+"): ("T0", 0),
-    (6, "eof"): ("T", 2),
-    (6, ")"): ("T", 2),
-    (6, "+"): ("T", 2),
-    (7, "F"): 10,
-    (7, "T"): 6,
-    (7, "("): 15,
-    (7, "E"): 16,
-    (7, "number"): 31,
-    (8, ")"): 33,
-    (9, "F"): 10,
-    (9, "T"): 20,
-    (9, "("): 15,
-    (9, "number"): 31,
-    (10, "eof"): ("E0", 0),
-    (10, ")"): ("E0", 0),
-    (10, "+"): 19,
-    (10, "E0"): 22,
-    (11, "eof"): ("E0", 3),
-    (11, ")"): ("E0", 3),
-    (12, "F"): 26,
-    (12, "("): 15,
-    (12, "number"): 31,
-    (13, "eof"): ("T0", 0),
-    (13, "T0"): 28,
-    (13, "*"): 25,
-    (13, ")"): ("T0", 0),
-    (13, "+"): ("T0", 0),
-    (14, "eof"): ("T0", 3),
-    (14, ")"): ("T0", 3),
-    (14, "+"): ("T0", 3),
-    (15, "eof"): ("F", 1),
-    (15, "*"): ("F", 1),
-    (15, ")"): ("F", 1),
-    (15, "+"): ("F", 1),
-    (16, "eof"): ("F", 3),
-    (16, "*"): ("F", 3),
-    (16, ")"): ("F", 3),
-    (16, "+"): ("F", 3),
+    return act & TAG_MASK == SHIFT_TAG
+
+
+def is_reduce(act: int) -> bool:
+    return act & TAG_MASK == REDUCE_TAG
+
+
+# sparse (state, symbol) -> action table in row-displacement form:
+# the action for (state, sym_id) lives at row_base[state] + sym_id
+# iff action_key holds state there; get_action returns 0 otherwise
+symbol_ids: dict[str, int] = {
+    "T0": 0,
+    "E": 1,
+    "number": 2,
+    "+": 3,
+    "eof": 4,
+    "E0": 5,
+    ")": 6,
+    "F": 7,
+    "*": 8,
+    "T": 9,
+    "(": 10,
 }  # type: ignore
 
+row_base: array = array("i", [0, 0, 1, 10, 0, 33, 10, 21, 21, 47, 42, 23, 29, 18, 39, 34, 51])  # type: ignore
+
+action_key: array = array("i", [4, 1, 1, 4, 4, 2, 4, 1, 4, 1, 1, 6, 6, 3, 3, 3, 3, 6, 13, 6, 6, 13, 13, 8, 13, 7, 13, 7, 8, 11, 8, 8, 12, 12, 12, 12, 5, 5, 15, 5, 15, 5, 14, 14, 10, 14, -1, 14, -1, 10, 9, 9, 10, 9, 16, 16, -1, 16, -1, -1, -1, -1])  # type: ignore
+
+action_data: array = array("i", [74, 18, 41, 11, 11, 4, 11, 34, 81, 26, 49, 90, 41, 65, 3, 58, 3, 34, 130, 26, 49, 11, 11, 41, 11, 27, 81, 27, 34, 113, 98, 49, 65, 3, 122, 3, 19, 19, 51, 19, 51, 19, 43, 43, 41, 43, 0, 43, 0, 106, 35, 35, 49, 35, 59, 59, 0, 59, 0, 0, 0, 0])  # type: ignore
+
+reduces: list[Reduce] = [
+    ("E0", 0),
+    ("T0", 0),
+    ("F", 1),
+    ("E", 2),
+    ("T", 2),
+    ("F", 3),
+    ("E0", 3),
+    ("T0", 3),
+]  # type: ignore
+
 states: list[int] = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16]  # type: ignore
 
 expected_tokens: dict[int, list[str]] = {
-    1: ["(", "number"],
+    1: ["number", "("],
+    3: ["+", ")", "eof"],
+    4: ["*", "+", ")", "eof"],
+    6: ["number", "("],
+    8: ["number", "("],
+    10: ["number", "("],
+    11: [")"],
+    12: ["+", ")", "eof"],
+    13: ["*", "+", ")", "eof"],
     2: ["eof"],
-    3: ["eof", ")", "+"],
-    4: ["eof", ")"],
-    5: ["eof", "*", ")", "+"],
-    6: ["eof", ")", "+"],
-    7: ["(", "number"],
-    8: [")"],
-    9: ["(", "number"],
-    10: ["eof", ")", "+"],
-    11: ["eof", ")"],
-    12: ["(", "number"],
-    13: ["eof", "*", ")", "+"],
-    14: ["eof", ")", "+"],
-    15: ["eof", "*", ")", "+"],
-    16: ["eof", "*", ")", "+"],
+    5: ["*", ")", "+", "eof"],
+    7: [")", "eof"],
+    9: ["+", ")", "eof"],
+    14: ["*", ")", "+", "eof"],
+    15: [")", "eof"],
+    16: ["+", ")", "eof"],
 }  # type: ignore
 
 tokenizer = Tokenizer(patterns, reserved, filename="(void)")  # type: ignore
 
 
+def get_action(state: int, sym_id: int) -> Action:
+    index = row_base[state] + sym_id
+    if 0 <= index < len(action_key) and action_key[index] == state:
+        return action_data[index]
+    return 0
+
+
 def parse(input_str: str) -> ParseTree:
     tokens = tokenizer.get_tokens_no_whitespace(input_str)
     stack, token_index = [states[0]], 0
     tree: list[ParseTree | Terminal] = []
 
+    # the table lookup and tag dispatch are inlined with every global
+    # hoisted into a local, so each token costs one dict probe, two
+    # array indexings and an int compare ordered by case frequency
+    base, key, data = row_base, action_key, action_data
+    n_slots = len(key)
+    get_sym_id = symbol_ids.get
+
     while stack:
         state = stack[-1]
         token = tokens[token_index]
-        match parsing_table.get((state, token.name)):
-            case int(action) if is_accept(action):
-                root = one(tree)
-                assert isinstance(root, ParseTree)
-                return root
-            case int(action) if is_shift(action):
-                stack.append(action >> 0b1)
-                tree.append(token)
-                token_index += 1
-            case (str(lhs), int(len_rhs)):
-                stack = stack[: -len_rhs or None]
-                act = parsing_table[(stack[-1], lhs)]
-                assert isinstance(act, int) and is_goto(act)
-                stack.append(act >> 0b1)
-                tree = tree[:-len_rhs] + [ParseTree(lhs, tree[-len_rhs:])]
-            case _:
-                raise SyntaxError(
-                    f"Encountered unexpected token `{token.lexeme}` "
-                    f"of type {token.name} at {token.loc}\n"
-                    f"Expected one of {expected_tokens.get(state, [])}"
-                )
+        index = base[state] + get_sym_id(token.name, -1)
+        action = data[index] if 0 <= index < n_slots and key[index] == state else 0
+        tag = action & TAG_MASK
+        if tag == SHIFT_TAG:
+            stack.append(action >> TAG_BITS)
+            tree.append(token)
+            token_index += 1
+        elif tag == REDUCE_TAG:
+            lhs, len_rhs = reduces[action >> TAG_BITS]
+            stack = stack[: -len_rhs or None]
+            act = get_action(stack[-1], symbol_ids[lhs])
+            assert is_goto(act)
+            stack.append(act >> TAG_BITS)
+            tree = tree[:-len_rhs] + [ParseTree(lhs, tree[-len_rhs:])]
+        elif tag == ACCEPT_TAG:
+            root = one(tree)
+            assert isinstance(root, ParseTree)
+            return root
+        else:
+            raise SyntaxError(
+                f"Encountered unexpected token `{token.lexeme}` "
+                f"of type {token.name} at {token.loc}\n"
+                f"Expected one of {expected_tokens.get(state, [])}"
+            )
     raise SyntaxError(
         f"Syntax error at {tokens[token_index] if token_index < len(tokens) else EOF}"
     )
@@ -1,17 +1,66 @@
 import os
-import subprocess
+import pickle
+import re
+from array import array
 from collections import defaultdict
-from hmac import HMAC
+from hashlib import sha256
 
 from rich.pretty import pretty_repr
 
-from grammar import Grammar, Terminal
+from grammar import Grammar
 from lr import Accept, Goto, LALR1ParsingTable, Reduce, Shift
 
 OUTPUT_DIR = "_generated"
 TEMPLATE_DIR = "templates"
 TEMPLATE_FILENAME = "parser_template.py"
 GENERATED_PARSER_FILE_NAME = "parser_generated.py"
+GENERATED_PATTERNS_FILE_NAME = "parser_patterns.pkl"
+
+# quoted template placeholders, e.g. "%patterns%"; the unquoted %id%
+# docstring stamp is substituted separately once the content is final
+PLACEHOLDER = re.compile(r'"%(\w+)%"')
+
+# actions are packed as (payload << TAG_BITS) | tag, so decoding is a
+# mask and a shift with no sign tricks; tag 0 is reserved for "no action"
+TAG_BITS = 3
+SHIFT_TAG, GOTO_TAG, REDUCE_TAG, ACCEPT_TAG = 0b001, 0b010, 0b011, 0b100
+
+
+def compress_table(
+    rows: dict[int, dict[int, int]], n_symbols: int, n_states: int
+) -> tuple[array, array, array]:
+    """
+    Pack the sparse ``{state: {symbol_id: action}}`` rows into flat arrays
+    using row displacement: each state's row is slid over a single array
+    until its populated columns fall into free slots.
+
+    Returns ``(row_base, action_key, action_data)`` where the action for
+    ``(state, sym_id)`` lives at ``index = row_base[state] + sym_id`` iff
+    ``action_key[index] == state``; any other key means "no action".
+    """
+
+    row_base = array("i", [0] * n_states)
+    action_key = array("i", [-1] * n_symbols)
+    action_data = array("i", [0] * n_symbols)
+
+    # place dense rows first so sparse ones can fill the gaps they leave
+    for state_id, row in sorted(rows.items(), key=lambda kv: -len(kv[1])):
+        base = 0
+        while any(
+            base + sym_id < len(action_key) and action_key[base + sym_id] != -1
+            for sym_id in row
+        ):
+            base += 1
+        if base + n_symbols > len(action_key):
+            grow = base + n_symbols - len(action_key)
+            action_key.extend([-1] * grow)
+            action_data.extend([0] * grow)
+        for sym_id, action in row.items():
+            action_key[base + sym_id] = state_id
+            action_data[base + sym_id] = action
+        row_base[state_id] = base
+
+    return row_base, action_key, action_data
 
 
 def gen_parser(grammar: Grammar):
@@ -19,72 +68,103 @@ def gen_parser(grammar: Grammar):
     states = [state.id for state in parsing_table.states]
     states.sort()
 
-    simplified_table = {}
+    symbol_ids: dict[str, int] = {
+        symbol.name: sym_id for sym_id, symbol in enumerate(grammar.symbols)
+    }
+    terminal_names = {terminal.name for terminal in grammar.terminals}
+
+    # one pass over the populated entries instead of probing every
+    # (state, symbol) pair in the cross product
+    rows: dict[int, dict[int, int]] = defaultdict(dict)
+    reduces: list[tuple[str, int]] = []
+    reduce_ids: dict[tuple[str, int], int] = {}
     expected_tokens = defaultdict(list)
-    for state in sorted(parsing_table.states, key=lambda state: state.id):
-        for symbol in grammar.terminals | grammar.non_terminals:
-            action = parsing_table.get((state, symbol.name), None)
-            if action is not None:
-                match action:
-                    case Shift(next_state):
-                        simplified_table[(state.id, symbol.name)] = (
-                            next_state.id << 1 | 0b1
-                        )
-                    case Goto(next_state):
-                        simplified_table[(state.id, symbol.name)] = next_state.id << 1
-                    case Reduce(lhs, len_rhs):
-                        simplified_table[(state.id, symbol.name)] = (lhs.name, len_rhs)
-                    case Accept():
-                        simplified_table[(state.id, symbol.name)] = -1
-                if isinstance(symbol, Terminal):
-                    expected_tokens[state.id].append(symbol.name)
+    for (state, symbol_name), action in parsing_table.items():
+        sym_id = symbol_ids[symbol_name]
+        match action:
+            case Shift(next_state):
+                rows[state.id][sym_id] = next_state.id << TAG_BITS | SHIFT_TAG
+            case Goto(next_state):
+                rows[state.id][sym_id] = next_state.id << TAG_BITS | GOTO_TAG
+            case Reduce(lhs, len_rhs):
+                reduce_id = reduce_ids.setdefault((lhs.name, len_rhs), len(reduce_ids))
+                if reduce_id == len(reduces):
+                    reduces.append((lhs.name, len_rhs))
+                rows[state.id][sym_id] = reduce_id << TAG_BITS | REDUCE_TAG
+            case Accept():
+                rows[state.id][sym_id] = ACCEPT_TAG
+        if symbol_name in terminal_names:
+            expected_tokens[state.id].append(symbol_name)
+
+    row_base, action_key, action_data = compress_table(
+        rows, len(symbol_ids), max(states) + 1
+    )
 
     tokenizer = grammar.tokenizer
 
     parser_template_file_path = os.path.join(TEMPLATE_DIR, TEMPLATE_FILENAME)
     parser_generated_file_path = os.path.join(OUTPUT_DIR, GENERATED_PARSER_FILE_NAME)
 
-    with open(parser_template_file_path, "r") as template, open(
-        parser_generated_file_path, "w"
-    ) as generated:
-        items = (
-            f"{identifier!r} : re.compile({pattern.pattern!r}, re.DOTALL)\n"
-            for identifier, pattern in tokenizer.patterns.items()
+    replacements = {
+        "patterns_file": repr(GENERATED_PATTERNS_FILE_NAME),
+        "filename": repr(tokenizer.get_filename()),
+        "reserved": repr(tokenizer.reserved),
+        "symbol_ids": pretty_repr(symbol_ids),
+        "row_base": repr(row_base),
+        "action_key": repr(action_key),
+        "action_data": repr(action_data),
+        "reduces": pretty_repr(reduces),
+        "states": pretty_repr(states),
+        "expected_tokens": pretty_repr(dict(expected_tokens)),
+    }
+
+    with open(parser_template_file_path, "r") as template:
+        # substitute every placeholder in one scan of the template
+        # instead of one full-text .replace pass per placeholder
+        generated_str = PLACEHOLDER.sub(
+            lambda placeholder: replacements[placeholder.group(1)], template.read()
         )
 
+    with open(parser_generated_file_path, "w") as generated:
         generated.write(
-            template.read()
-            .replace(
-                '"%patterns%"',
-                f"{{{', '.join(items)}}} ",
-            )
-            .replace('"%filename%"', repr(tokenizer.get_filename()))
-            .replace('"%reserved%"', repr(tokenizer.reserved))
-            .replace('"%parsing_table%"', pretty_repr(simplified_table))
-            .replace('"%states%"', pretty_repr(states))
-            .replace('"%expected_tokens%"', pretty_repr(dict(expected_tokens)))
+            generated_str.replace("%id%", sha256(generated_str.encode()).hexdigest())
         )
+
+    # ship the compiled patterns alongside the parser instead of
+    # embedding their sources as a dict literal
+    patterns_file_path = os.path.join(OUTPUT_DIR, GENERATED_PATTERNS_FILE_NAME)
+    with open(patterns_file_path, "wb") as patterns_file:
+        pickle.dump(tokenizer.patterns, patterns_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return parser_generated_file_path
+
+
+def format_generated_files(file_paths: list[str]):
+    # format in process; spawning a black subprocess pays interpreter
+    # startup and re-reads every file from disk
     try:
-        subprocess.run(["black", parser_generated_file_path])
-    except FileNotFoundError:
+        import black
+    except ImportError:
         print("Black not found, skipping formatting")
+        return
 
-    with open(parser_generated_file_path, "r") as generated:
-        generated_str = generated.read()
-
-    with open(parser_generated_file_path, "w") as generated:
-        generated.write(
-            generated_str.replace(
-                "%id%", HMAC(b"key", generated_str.encode(), "sha256").hexdigest()
-            )
-        )
+    mode = black.Mode()
+    for file_path in file_paths:
+        with open(file_path, "r") as file:
+            source = file.read()
+        try:
+            formatted = black.format_file_contents(source, fast=True, mode=mode)
+        except black.NothingChanged:
+            continue
+        with open(file_path, "w") as file:
+            file.write(formatted)
 
 
 def generate_files(grammar_str: str):
     g = Grammar.from_str(grammar_str)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    gen_parser(g)
+    format_generated_files([gen_parser(g)])
 
 
 if __name__ == "__main__":
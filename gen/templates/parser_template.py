@@ -2,36 +2,66 @@
     ID: %id%
 """
 
+import os
+import pickle
 import re
+from array import array
 
 from more_itertools import one
 
 from grammar import EOF, Terminal, Tokenizer
 from parsers.parser import ParseTree
 
-patterns: dict[str, re.Pattern] = "%patterns%"  # type: ignore
+# the token patterns are compiled by the generator and pickled next to
+# this file; they are restored here in one load instead of being parsed
+# out of an embedded source literal
+with open(
+    os.path.join(os.path.dirname(__file__), "%patterns_file%"), "rb"
+) as _patterns_file:
+    patterns: dict[str, re.Pattern] = pickle.load(_patterns_file)
 
 reserved: frozenset[str] = "%reserved%"  # type: ignore
 
 
 Shift = Goto = Accept = int
 Reduce = tuple[str, int]
-Action = int | Reduce
+Action = int
+
+# actions are packed as (payload << TAG_BITS) | tag; tag 0 is "no action",
+# so classifying an action is one mask and decoding it one shift
+TAG_BITS = 3
+TAG_MASK = 0b111
+SHIFT_TAG, GOTO_TAG, REDUCE_TAG, ACCEPT_TAG = 0b001, 0b010, 0b011, 0b100
 
 
 def is_accept(act: int) -> bool:
-    return act == -1
+    return act & TAG_MASK == ACCEPT_TAG
 
 
 def is_goto(act: int) -> bool:
-    return act & 0b1 == 0b0
+    return act & TAG_MASK == GOTO_TAG
 
 
 def is_shift(act: int) -> bool:
-    return act & 0b1 == 0b1
+    return act & TAG_MASK == SHIFT_TAG
+
+
+def is_reduce(act: int) -> bool:
+    return act & TAG_MASK == REDUCE_TAG
+
+
+# sparse (state, symbol) -> action table in row-displacement form:
+# the action for (state, sym_id) lives at row_base[state] + sym_id
+# iff action_key holds state there; get_action returns 0 otherwise
+symbol_ids: dict[str, int] = "%symbol_ids%"  # type: ignore
 
+row_base: array = "%row_base%"  # type: ignore
 
-parsing_table: dict[tuple[int, str], Action] = "%parsing_table%"  # type: ignore
+action_key: array = "%action_key%"  # type: ignore
+
+action_data: array = "%action_data%"  # type: ignore
+
+reduces: list[Reduce] = "%reduces%"  # type: ignore
 
 states: list[int] = "%states%"  # type: ignore
 
@@ -40,35 +70,52 @@ expected_tokens: dict[int, list[str]] = "%expected_tokens%"  # type: ignore
 tokenizer = Tokenizer(patterns, reserved, filename="%filename%")  # type: ignore
 
 
+def get_action(state: int, sym_id: int) -> Action:
+    index = row_base[state] + sym_id
+    if 0 <= index < len(action_key) and action_key[index] == state:
+        return action_data[index]
+    return 0
+
+
 def parse(input_str: str) -> ParseTree:
     tokens = tokenizer.get_tokens_no_whitespace(input_str)
     stack, token_index = [states[0]], 0
     tree: list[ParseTree | Terminal] = []
 
+    # the table lookup and tag dispatch are inlined with every global
+    # hoisted into a local, so each token costs one dict probe, two
+    # array indexings and an int compare ordered by case frequency
+    base, key, data = row_base, action_key, action_data
+    n_slots = len(key)
+    get_sym_id = symbol_ids.get
+
     while stack:
         state = stack[-1]
         token = tokens[token_index]
-        match parsing_table.get((state, token.name)):
-            case int(action) if is_accept(action):
-                root = one(tree)
-                assert isinstance(root, ParseTree)
-                return root
-            case int(action) if is_shift(action):
-                stack.append(action >> 0b1)
-                tree.append(token)
-                token_index += 1
-            case (str(lhs), int(len_rhs)):
-                stack = stack[: -len_rhs or None]
-                act = parsing_table[(stack[-1], lhs)]
-                assert isinstance(act, int) and is_goto(act)
-                stack.append(act >> 0b1)
-                tree = tree[:-len_rhs] + [ParseTree(lhs, tree[-len_rhs:])]
-            case _:
-                raise SyntaxError(
-                    f"Encountered unexpected token `{token.lexeme}` "
-                    f"of type {token.name} at {token.loc}\n"
-                    f"Expected one of {expected_tokens.get(state, [])}"
-                )
+        index = base[state] + get_sym_id(token.name, -1)
+        action = data[index] if 0 <= index < n_slots and key[index] == state else 0
+        tag = action & TAG_MASK
+        if tag == SHIFT_TAG:
+            stack.append(action >> TAG_BITS)
+            tree.append(token)
+            token_index += 1
+        elif tag == REDUCE_TAG:
+            lhs, len_rhs = reduces[action >> TAG_BITS]
+            stack = stack[: -len_rhs or None]
+            act = get_action(stack[-1], symbol_ids[lhs])
+            assert is_goto(act)
+            stack.append(act >> TAG_BITS)
+            tree = tree[:-len_rhs] + [ParseTree(lhs, tree[-len_rhs:])]
+        elif tag == ACCEPT_TAG:
+            root = one(tree)
+            assert isinstance(root, ParseTree)
+            return root
+        else:
+            raise SyntaxError(
+                f"Encountered unexpected token `{token.lexeme}` "
+                f"of type {token.name} at {token.loc}\n"
+                f"Expected one of {expected_tokens.get(state, [])}"
+            )
     raise SyntaxError(
         f"Syntax error at {tokens[token_index] if token_index < len(tokens) else EOF}"
     )
@@ -1,5 +1,6 @@
 import re
 from collections import defaultdict, deque
+from functools import cache
 from itertools import count
 from typing import Iterator, Optional, Sequence
 
@@ -34,7 +35,14 @@ def update_set(set1, set2):
 
 
 class Grammar(FrozenDict[NonTerminal, frozenset[Expansion]]):
-    __slots__ = ("terminals", "non_terminals", "start", "orig_start", "tokenizer")
+    __slots__ = (
+        "terminals",
+        "non_terminals",
+        "symbols",
+        "start",
+        "orig_start",
+        "tokenizer",
+    )
 
     def __init__(
         self,
@@ -48,6 +56,7 @@ class Grammar(FrozenDict[NonTerminal, frozenset[Expansion]]):
         super().__init__(mapping)
         self.terminals = terminals
         self.non_terminals = non_terminals
+        self.symbols = terminals | non_terminals
         self.orig_start = orig_start
         self.start = start
         self.tokenizer = tokenizer
@@ -57,6 +66,7 @@ class Grammar(FrozenDict[NonTerminal, frozenset[Expansion]]):
             for expansion in expansions:
                 yield origin, expansion
 
+    @cache
     def gen_nullable(self) -> NullableSet:
         NULLABLE: NullableSet = {EMPTY}
 
@@ -72,13 +82,19 @@ class Grammar(FrozenDict[NonTerminal, frozenset[Expansion]]):
         return NULLABLE
 
     def first(self, symbols: Sequence[Symbol]) -> set[Terminal]:
-        if not symbols:
-            return {EMPTY}
-
-        x, *xs = symbols
         FIRST = self.gen_first()
-        return FIRST[x] | self.first(xs) if (x in self.gen_nullable()) else FIRST[x]
+        nullable = self.gen_nullable()
+
+        first_set: set[Terminal] = set()
+        for symbol in symbols:
+            first_set |= FIRST[symbol]
+            if symbol not in nullable:
+                return first_set
+        # every symbol (or none at all) was nullable
+        first_set.add(EMPTY)
+        return first_set
 
+    @cache
     def gen_first(self) -> FirstSet:
         FIRST: FirstSet = defaultdict(set)
         FIRST.update({terminal: {terminal} for terminal in self.terminals})
@@ -97,6 +113,7 @@ class Grammar(FrozenDict[NonTerminal, frozenset[Expansion]]):
                             break
         return FIRST
 
+    @cache
     def gen_follow(self) -> FollowSet:
         FOLLOW: FollowSet = defaultdict(set)
         FOLLOW[self.start] = {EOF}
@@ -70,6 +70,9 @@ class Marker(Terminal):
 EMPTY = Marker("ε", "ε", Loc("(ε)", 0, 0, 0))
 EOF = Marker("eof", "$", Loc("(eof)", 0, 0, 0))
 
+# whitespace we skip over in one go, excluding newlines (they are tokens)
+LONG_WHITESPACE = re.compile(r"[ \r\t]+")
+
 
 class NonTerminal(Symbol):
     def __init__(self, name: str, original_repr: Optional[str] = None):
@@ -95,14 +98,23 @@ class Expansion(tuple[Symbol]):
     def __new__(cls, args: Optional[Iterable[Symbol]] = None) -> "Expansion":
         if args is None:
             args = []
-        return tuple.__new__(Expansion, args)  # type: ignore
+        expansion = tuple.__new__(Expansion, args)  # type: ignore
+        # expansions are immutable, so the EMPTY-stripped view every
+        # iteration yields can be computed once instead of per call
+        expansion._non_empty = tuple(
+            symbol for symbol in tuple.__iter__(expansion) if symbol is not EMPTY
+        )
+        expansion._terminals = tuple(
+            symbol for symbol in expansion._non_empty if isinstance(symbol, Terminal)
+        )
+        return expansion
 
     @staticmethod
     def empty() -> "Expansion":
         return Expansion({EMPTY})
 
     def __iter__(self):
-        yield from filter(lambda token: token is not EMPTY, super().__iter__())
+        return iter(self._non_empty)
 
     def matches(self, tokens: Sequence[Terminal]) -> bool:
         if len(self) == len(tokens):
@@ -134,9 +146,14 @@ class Expansion(tuple[Symbol]):
             return True
 
         # if we have more non-nullables than the number of tokens
-        # we should prune
-        if len(tuple(filter(lambda sym: sym not in nullable_set, self))) > len(tokens):
-            return True
+        # we should prune; bail out as soon as the count goes over
+        # instead of materializing the filtered symbols
+        budget = len(tokens)
+        for symbol in self:
+            if symbol not in nullable_set:
+                budget -= 1
+                if budget < 0:
+                    return True
 
         # if we have a prefix of terminals which doesn't match the tokens
         # we should prune
@@ -151,18 +168,21 @@ class Expansion(tuple[Symbol]):
             # we should prune
             return len(self) != len(tokens)
 
-        # if any of the tokens in the sentential form is not in the tokens,
-        # we should prune
-        for terminal in filter(lambda item: isinstance(item, Terminal), self):
-            if not any(terminal == token for token in tokens):
+        # if any of the terminals in the sentential form is not in the
+        # tokens, we should prune; terminals compare by name, so one
+        # name set answers every membership test instead of rescanning
+        # the tokens per terminal
+        token_names = {token.name for token in tokens}
+        for terminal in self._terminals:
+            if terminal.name not in token_names:
                 return True
         return False
 
     def __hash__(self):
-        return hash(tuple(self))
+        return hash(self._non_empty)
 
     def __len__(self):
-        return super().__len__() - self.count(EMPTY)
+        return len(self._non_empty)
 
     def __str__(self):
         return f'{"".join(str(item) for item in super().__iter__())}'
@@ -190,6 +210,30 @@ class Tokenizer:
         self._code_offset = 0
         self.patterns = patterns
         self.reserved = reserved
+        self._scanner, self._group_indices = self._compile_scanner(patterns)
+
+    @staticmethod
+    def _compile_scanner(
+        patterns: dict[str, re.Pattern]
+    ) -> tuple[re.Pattern, list[int]]:
+        """
+        Combine all patterns into a single regex so each position in the
+        code is scanned with one match call instead of one per pattern.
+        Every pattern becomes an optional zero-width lookahead capture,
+        which lets a single scan report the candidate match of every
+        pattern at once while keeping longest-match semantics.
+        """
+        parts: list[str] = []
+        group_indices: list[int] = []
+        group_index = 1
+        for pattern in patterns.values():
+            source = pattern.pattern
+            if pattern.flags & re.DOTALL:
+                source = f"(?s:{source})"
+            parts.append(f"(?=({source}))?")
+            group_indices.append(group_index)
+            group_index += pattern.groups + 1
+        return re.compile("".join(parts)), group_indices
 
     def get_filename(self):
         return self._filename
@@ -212,23 +256,24 @@ class Tokenizer:
     def _current_char(self):
         return self._code[self._code_offset]
 
-    def _remaining_code(self):
-        return self._code[self._code_offset :]
-
     def _tokenize(self) -> Iterator[Terminal]:
         while self._code_offset < len(self._code):
             token_location = Loc(
                 self._filename, self._linenum, self._column, self._code_offset
             )
-            # greedy attempt
-            matches: list[tuple[str, str]] = []
-            for identifier, pattern in self.patterns.items():
-                matching = pattern.match(self._remaining_code())
-                if matching is not None:
-                    matches.append((matching.group(0), identifier))
-            if matches:
-                # get the longest match
-                lexeme, identifier = max(matches, key=lambda t: len(t[0]))
+            # greedy attempt: one scan reports every pattern's candidate
+            # match here; pick the longest (ties go to the first pattern)
+            scanned = self._scanner.match(self._code, self._code_offset)
+            assert scanned is not None  # every alternative is optional
+            best_span, identifier = (0, 0), None
+            for pattern_identifier, group_index in zip(
+                self.patterns, self._group_indices
+            ):
+                start, end = scanned.span(group_index)
+                if start != -1 and end - start > best_span[1] - best_span[0]:
+                    best_span, identifier = (start, end), pattern_identifier
+            if identifier is not None:
+                lexeme = scanned.string[best_span[0] : best_span[1]]
                 self._skip_n_chars(len(lexeme) - 1)
                 if lexeme in self.reserved:
                     token = Terminal.from_token_type(lexeme, token_location)
@@ -240,7 +285,9 @@ class Tokenizer:
                 if (
                     self._current_char() != "\n"
                     and (
-                        long_whitespace := re.match(r"[ \r\t]+", self._remaining_code())
+                        long_whitespace := LONG_WHITESPACE.match(
+                            self._code, self._code_offset
+                        )
                     )
                     is not None
                 ):
@@ -267,10 +314,10 @@ class Tokenizer:
         yield EOF
 
     def handle_comment(self):
-        end_comment_pos = self._remaining_code().index("\n")
+        end_comment_pos = self._code.find("\n", self._code_offset)
         if end_comment_pos == -1:
             raise ValueError()
-        comment = self._remaining_code()[:end_comment_pos]
+        comment = self._code[self._code_offset : end_comment_pos]
         token = Terminal(
             "comment",
             comment,
@@ -41,6 +41,8 @@ class LRState(list[T]):
             isinstance(item, cls) for item in items
         ), "All items must be Completable"
         super().__init__()
+        # mirror of the list contents for O(1) membership tests
+        self._members: set[T] = set()
         self.extend(items)
 
     @property
@@ -52,9 +54,13 @@ class LRState(list[T]):
     def append(self, completable: T) -> None:
         if not isinstance(completable, self.type):
             raise TypeError(f"Expected {self.type}, got {type(completable)}")
-        if completable not in self:
+        if completable not in self._members:
+            self._members.add(completable)
             super().append(completable)
 
+    def __contains__(self, item) -> bool:
+        return item in self._members
+
     def extend(self, completables: Iterable[T]) -> None:
         for item in completables:
             self.append(item)
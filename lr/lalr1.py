@@ -1,139 +1,96 @@
-from collections import defaultdict
-
-from more_itertools import one
-
-from grammar import Grammar, NonTerminal, Terminal
-from lr.core import Goto, LRState, Reduce, Shift, T
-from lr.lr0 import LR0Item, LR0ParsingTable
-
-
-class AugmentedSymbol(NonTerminal):
-    def __init__(self, symbol: NonTerminal, start: LRState[T], end: LRState[T]):
-        super().__init__(f"{symbol!r} <{start.id!r}-{end.id!r}>")
-        self.symbol: NonTerminal = symbol
-        self.start: LRState[T] = start
-        self.end: LRState[T] = end
-
-    def __repr__(self):
-        return f"{self.symbol!r} [{self.start.id!r}:{self.end.id!r}]"
-
-
-class LALR1ParsingTable(LR0ParsingTable):
-    def __init__(self, grammar: Grammar):
-        super().__init__(grammar, reduce=False)
-        self.lookaheads = self.compute_lookaheads()
-        self.compute_reduce_actions()
-
-    def compute_reduce_actions(self):
-        for state in self.states:
-            for item in state.yield_finished():
-                lookahead = self.lookaheads[state][item]
-                for symbol in lookahead:
-                    if (state, symbol.name) not in self:
-                        self[(state, symbol.name)] = Reduce(
-                            item.name, len(item.expansion)
-                        )
-                    else:
-                        raise ValueError(
-                            f"Encountered conflict on \n"
-                            f" state: {str(state)}\n and symbol: {symbol.name}\n"
-                            f"  {self[(state, symbol.name)]} and \n"
-                            f"  {Reduce(item.name, len(item.expansion))}"
-                        )
-
-    def compute_augmented_grammar(
-        self,
-    ) -> tuple[Grammar, dict[LRState, dict[NonTerminal, AugmentedSymbol]]]:
-        augmented_grammar = Grammar.Builder()
-
-        old2new: dict[LRState, dict[NonTerminal, AugmentedSymbol]] = defaultdict(dict)
-
-        for start_state in self.states:
-            for item in start_state:
-                if item.at_start:
-                    (name, dot, rule) = item
-                    # trace out the path of this rule
-                    augmented_rule = []
-                    new_name = AugmentedSymbol(
-                        name, start_state, self.goto(start_state, name)
-                    )
-                    current_state = start_state
-                    for symbol in rule:
-                        if (current_state, symbol.name) == self.accept:
-                            continue
-                        match self[(current_state, symbol.name)]:
-                            case Goto(next_state) | Shift(next_state):
-                                if isinstance(symbol, NonTerminal):
-                                    augmented_rule.append(
-                                        AugmentedSymbol(
-                                            symbol, current_state, next_state
-                                        )
-                                    )
-                                else:
-                                    augmented_rule.append(symbol)
-                                current_state = next_state
-                            case _:
-                                raise Exception("Unexpected action")
-                    old2new[start_state][name] = new_name
-                    augmented_grammar.add_expansion(new_name, augmented_rule)
-
-        return augmented_grammar.build(self.grammar.tokenizer), old2new
-
-    def get_only_completable_item(
-        self, current_state: LRState[LR0Item], current_item: LR0Item
-    ) -> LR0Item:
-        return one(
-            (
-                item
-                for item in current_state
-                if item.name == current_item.name
-                and item.expansion == current_item.expansion
-                and (
-                    item.completed()
-                    or (item.expansion[item.dot] and item.name == self.grammar.start)
-                )
-            ),
-            too_short=ValueError(f"No completable item found in: {current_state}"),
-            too_long=ValueError(f"Multiple completable items found in {current_state}"),
-        )
-
-    def compute_lookaheads(self) -> dict[LRState, dict[LR0Item, set[Terminal]]]:
-        augmented_grammar, old2new = self.compute_augmented_grammar()
-
-        augmented_follow = augmented_grammar.gen_follow()
-        lookaheads: dict[LRState, dict[LR0Item, set[Terminal]]] = defaultdict(
-            lambda: defaultdict(set)
-        )
-        # propagate the follow set
-        for start_state in self.states:
-            for current_item in start_state:
-                if current_item.at_start:
-                    current_state = start_state
-                    for symbol in current_item.expansion:
-                        if (current_state, symbol.name) == self.accept:
-                            continue
-                        match self[(current_state, symbol.name)]:
-                            case Goto(next_state) | Shift(next_state):
-                                current_state = next_state
-                            case _:
-                                raise Exception("Unexpected action")
-
-                    completed_item = self.get_only_completable_item(
-                        current_state, current_item
+from collections import deque
+
+from grammar import EOF, Terminal
+from lr.core import Accept, Goto, LRState, Shift
+from lr.lr1 import LR1Item, LR1ParsingTable
+
+Core = tuple
+CoreKey = frozenset
+
+
+class LALR1ParsingTable(LR1ParsingTable):
+    """
+    LALR(1) table built by merging LR(1) states on the fly: states are
+    indexed by their set of LR(0) cores `(name, dot, expansion)` and the
+    lookaheads of colliding states are unioned in place, with a state
+    re-enqueued for goto expansion whenever one of its lookahead sets
+    grows. This keeps the state count at LR(0) size throughout instead
+    of building the full canonical LR(1) collection (or running a
+    separate lookahead-propagation pass) and collapsing afterwards.
+    """
+
+    @staticmethod
+    def to_state(cores: dict[Core, set[Terminal]]) -> LRState[LR1Item]:
+        state = LRState[LR1Item](cls=LR1Item)
+        for (name, dot, rule), lookaheads in cores.items():
+            for lookahead in lookaheads:
+                state.append(LR1Item(name, dot, rule, lookahead))
+        return state
+
+    def construct(self):
+        # per merged state (keyed by its LR(0) cores), the lookaheads
+        # accumulated so far for each core
+        states: dict[CoreKey, dict[Core, set[Terminal]]] = {}
+        worklist: deque[CoreKey] = deque()
+
+        def merge(state: LRState[LR1Item]) -> CoreKey:
+            key = frozenset((item.name, item.dot, item.expansion) for item in state)
+            cores = states.get(key)
+            if cores is None:
+                cores = {}
+                for name, dot, rule, lookahead in state:
+                    cores.setdefault((name, dot, rule), set()).add(lookahead)
+                states[key] = cores
+                worklist.append(key)
+            else:
+                grew = False
+                for name, dot, rule, lookahead in state:
+                    lookaheads = cores[(name, dot, rule)]
+                    if lookahead not in lookaheads:
+                        lookaheads.add(lookahead)
+                        grew = True
+                if grew:
+                    worklist.append(key)
+            return key
+
+        merge(self.closure(self.init_kernel()))
+
+        # goto targets are stable under lookahead growth, so transitions
+        # can be recorded on core keys while the lookaheads converge
+        transitions: dict[tuple[CoreKey, str], tuple[CoreKey, bool]] = {}
+        accept_key = None
+        while worklist:
+            key = worklist.popleft()
+            state = self.to_state(states[key])
+            for item in state.yield_unfinished():
+                symbol = item.expansion[item.dot]
+                if symbol is EOF:
+                    accept_key = key
+                else:
+                    target_key = merge(self.goto(state, symbol))
+                    transitions[(key, symbol.name)] = (
+                        target_key,
+                        isinstance(symbol, Terminal),
                     )
 
-                    augmented_name = old2new[start_state][completed_item.name]
-                    lookaheads[current_state][completed_item] |= augmented_follow[
-                        augmented_name
-                    ]
+        final = {key: self.to_state(cores) for key, cores in states.items()}
+        self.states = list(final.values())
+        for (key, symbol_name), (target_key, is_terminal) in transitions.items():
+            state, target = final[key], final[target_key]
+            self[(state, symbol_name)] = Shift(target) if is_terminal else Goto(target)
+        if accept_key is not None:
+            self[(final[accept_key], EOF.name)] = Accept()
+            self.accept = (final[accept_key], EOF.name)
 
-        return lookaheads
+        if self.reduce:
+            self.compute_reduce_actions()
 
 
 if __name__ == "__main__":
     from rich import print as print_rich
     from rich.pretty import pretty_repr
 
+    from grammar import Grammar
     from utils.grammars import GRAMMAR1
 
     cfg = Grammar.from_str(*GRAMMAR1)
@@ -1,3 +1,4 @@
+from collections import deque
 from dataclasses import dataclass
 from functools import cache
 
@@ -47,24 +48,56 @@ class LR1ParsingTable(LR0ParsingTable):
         )
 
     @cache
+    def first_sentential_form(
+        self, beta: tuple, lookahead: Terminal
+    ) -> frozenset[Terminal]:
+        """first(βd) for the (short, heavily reused) tails seen during closure"""
+        return frozenset(self.grammar.first(beta + (lookahead,)))
+
     def closure(self, configuration_set: LRState[LR1Item]) -> LRState[LR1Item]:
         """
         Compute the closure of LR(1) item set
         :param configuration_set: a set of LR(1) items
         :return: closure of the set
+
+        Lookaheads are merged per LR(0) core and only unmarked cores are
+        processed, so each core is revisited only when its lookahead set
+        actually grows instead of rescanning every item until a fixpoint.
         """
 
-        items = configuration_set.copy()
-        while True:
-            initial_closure_size = len(items)
-            for _, dot, rule, lookahead in items.yield_unfinished():
-                b, beta = rule[dot], rule[dot + 1 :]
-                if isinstance(b, NonTerminal):
-                    for gamma in self.grammar[b]:
-                        for w in self.grammar.first(beta + (lookahead,)):
-                            items.append(LR1Item(b, 0, gamma, w))
-            if len(items) == initial_closure_size:
-                break
+        lookaheads: dict[tuple, set[Terminal]] = {}
+        unmarked: deque[tuple] = deque()
+        for name, dot, rule, lookahead in configuration_set:
+            core = (name, dot, rule)
+            if core not in lookaheads:
+                lookaheads[core] = set()
+                unmarked.append(core)
+            lookaheads[core].add(lookahead)
+
+        while unmarked:
+            name, dot, rule = core = unmarked.popleft()
+            if dot >= len(rule):
+                continue
+            b, beta = rule[dot], rule[dot + 1 :]
+            if not isinstance(b, NonTerminal):
+                continue
+            delta: set[Terminal] = set()
+            for lookahead in lookaheads[core]:
+                delta |= self.first_sentential_form(beta, lookahead)
+            for gamma in self.grammar[b]:
+                new_core = (b, 0, gamma)
+                gamma_lookaheads = lookaheads.get(new_core)
+                if gamma_lookaheads is None:
+                    lookaheads[new_core] = set(delta)
+                    unmarked.append(new_core)
+                elif not delta <= gamma_lookaheads:
+                    gamma_lookaheads |= delta
+                    unmarked.append(new_core)
+
+        items = LRState[LR1Item](cls=LR1Item)
+        for (name, dot, rule), merged in lookaheads.items():
+            for lookahead in merged:
+                items.append(LR1Item(name, dot, rule, lookahead))
         return items
 
     def compute_reduce_actions(self):